@@ -0,0 +1,29 @@
+# Generated by Django 4.2 on 2026-10-15 10:00
+
+import hashlib
+
+from django.db import migrations
+
+
+def _signature(text):
+    norm = " ".join(text.lower().split())
+    return hashlib.blake2b(norm.encode("utf-8"), digest_size=16).hexdigest()
+
+
+def rehash_signatures(apps, schema_editor):
+    GeneratedQuestion = apps.get_model('interviewapp', 'GeneratedQuestion')
+    rows = list(GeneratedQuestion.objects.only('id', 'text'))
+    for row in rows:
+        row.signature = _signature(row.text)
+    GeneratedQuestion.objects.bulk_update(rows, ['signature'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('interviewapp', '0007_answer_audio_file'),
+    ]
+
+    operations = [
+        migrations.RunPython(rehash_signatures, migrations.RunPython.noop),
+    ]
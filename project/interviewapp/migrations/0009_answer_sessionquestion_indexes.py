@@ -0,0 +1,21 @@
+# Generated by Django 4.2 on 2026-10-15 22:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('interviewapp', '0008_rehash_question_signatures'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='answer',
+            index=models.Index(fields=['session', 'processed'], name='interviewap_session_39f519_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='sessionquestion',
+            index=models.Index(fields=['session', 'order'], name='interviewap_session_bf37ba_idx'),
+        ),
+    ]
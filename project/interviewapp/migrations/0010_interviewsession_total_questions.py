@@ -0,0 +1,27 @@
+# Generated by Django 4.2 on 2026-10-15 22:14
+
+from django.db import migrations, models
+
+
+def backfill_total_questions(apps, schema_editor):
+    InterviewSession = apps.get_model('interviewapp', 'InterviewSession')
+    sessions = list(InterviewSession.objects.annotate(n_answers=models.Count('answers')))
+    for s in sessions:
+        s.total_questions = s.n_answers
+    InterviewSession.objects.bulk_update(sessions, ['total_questions'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('interviewapp', '0009_answer_sessionquestion_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='interviewsession',
+            name='total_questions',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.RunPython(backfill_total_questions, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.2 on 2026-10-15 22:22
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('interviewapp', '0010_interviewsession_total_questions'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='generatedquestion',
+            index=models.Index(fields=['role', 'id'], name='interviewap_role_cad243_idx'),
+        ),
+    ]
@@ -0,0 +1,44 @@
+# Generated by Django 4.2 on 2026-10-15 22:24
+
+from django.db import migrations, models
+
+
+def merge_duplicate_signatures(apps, schema_editor):
+    """Keep the oldest row per signature and repoint references to it before the constraint lands."""
+    GeneratedQuestion = apps.get_model('interviewapp', 'GeneratedQuestion')
+    Answer = apps.get_model('interviewapp', 'Answer')
+    SessionQuestion = apps.get_model('interviewapp', 'SessionQuestion')
+
+    dup_sigs = (
+        GeneratedQuestion.objects.exclude(signature='')
+        .values('signature')
+        .annotate(n=models.Count('id'))
+        .filter(n__gt=1)
+        .values_list('signature', flat=True)
+    )
+    keep = {}
+    drop = {}
+    for qid, sig in GeneratedQuestion.objects.filter(signature__in=list(dup_sigs)).order_by('id').values_list('id', 'signature'):
+        if sig in keep:
+            drop[qid] = keep[sig]
+        else:
+            keep[sig] = qid
+    for old_id, new_id in drop.items():
+        Answer.objects.filter(question_id=old_id).update(question_id=new_id)
+        SessionQuestion.objects.filter(question_id=old_id).update(question_id=new_id)
+    GeneratedQuestion.objects.filter(id__in=list(drop)).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('interviewapp', '0011_generatedquestion_role_id_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(merge_duplicate_signatures, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='generatedquestion',
+            constraint=models.UniqueConstraint(condition=models.Q(('signature', ''), _negated=True), fields=('signature',), name='uq_generatedquestion_signature'),
+        ),
+    ]
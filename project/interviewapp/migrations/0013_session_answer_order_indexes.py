@@ -0,0 +1,25 @@
+# Generated by Django 4.2 on 2026-10-15 22:29
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('interviewapp', '0012_unique_question_signature'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='answer',
+            name='interviewap_session_39f519_idx',
+        ),
+        migrations.AddIndex(
+            model_name='answer',
+            index=models.Index(fields=['session', 'processed', 'index'], name='interviewap_session_edde75_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='interviewsession',
+            index=models.Index(fields=['user', '-started_at'], name='interviewap_user_id_7d8bc3_idx'),
+        ),
+    ]
@@ -1,4 +1,5 @@
 # interviewapp/models.py
+from functools import cached_property
 from django.db import models
 from django.contrib.auth import get_user_model
 
@@ -30,9 +31,34 @@ class GeneratedQuestion(models.Model):
     signature = models.CharField(max_length=128, blank=True, db_index=True)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['role', 'id']),  # "first unused question for role" lookups
+        ]
+        constraints = [
+            # lets inserts rely on ignore_conflicts instead of a racy SELECT-then-INSERT
+            models.UniqueConstraint(
+                fields=['signature'],
+                condition=~models.Q(signature=''),
+                name='uq_generatedquestion_signature',
+            ),
+        ]
+
+    @cached_property
+    def keywords_list(self):
+        # parsed once per instance instead of on every scoring call
+        return tuple(k.strip().lower() for k in self.keywords.split(",") if k.strip())
+
     def __str__(self):
         return f"{self.role} - {self.text[:70]}"
 
+class InterviewSessionQuerySet(models.QuerySet):
+    def with_stats(self):
+        """Annotate the processed-answer count so answered_count needs no per-session query."""
+        return self.annotate(
+            _answered_count=models.Count("answers", filter=models.Q(answers__processed=True)),
+        )
+
 class InterviewSession(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE)
     role = models.CharField(max_length=50, default='general')
@@ -42,18 +68,22 @@ class InterviewSession(models.Model):
     total_score = models.FloatField(null=True, blank=True)
     completed = models.BooleanField(default=False)
     completed_at = models.DateTimeField(null=True, blank=True)
-    total_questions = models.IntegerField(default=0)  # Track total questions
+    total_questions = models.IntegerField(default=0)  # kept in sync whenever Answer rows are added
+
+    objects = InterviewSessionQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', '-started_at']),  # dashboard: latest sessions per user
+        ]
     
-    @property
+    @cached_property
     def answered_count(self):
+        # computed once per instance; with_stats() supplies it without a query
+        if hasattr(self, "_answered_count"):
+            return self._answered_count
         return self.answers.filter(processed=True).count()
 
-    
-    @property
-    def total_questions(self):
-        # ✅ total questions in this session
-        return self.answers.count()
-
     @property
     def duration(self):
         if self.started_at and self.completed_at:
@@ -80,7 +110,11 @@ class Answer(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     improvement_tips = models.JSONField(null=True, blank=True)
     class Meta:
-        unique_together = ('session','index')
+        unique_together = ('session','index')  # also serves the (session, index) lookups/ordering
+        indexes = [
+            # next unprocessed answer in order, and processed counts per session
+            models.Index(fields=['session', 'processed', 'index']),
+        ]
 
 class SessionQuestion(models.Model):
     """Links questions to specific sessions to prevent repeats"""
@@ -91,6 +125,9 @@ class SessionQuestion(models.Model):
     
     class Meta:
         ordering = ['order']
+        indexes = [
+            models.Index(fields=['session', 'order']),
+        ]
     
     def __str__(self):
         return f"Session {self.session.id} - Q{self.order}"
\ No newline at end of file
@@ -1,56 +1,83 @@
 # interviewapp/nlp_utils.py
-import spacy
-nlp = spacy.load("en_core_web_sm")
+import re
 FILLERS = {"um","uh","like","you know","hmm"}
+# one C-level scan over the raw text; also matches multi-word fillers like "you know"
+FILLER_RE = re.compile(
+    r"\b(?:" + "|".join(re.escape(f) for f in sorted(FILLERS, key=len, reverse=True)) + r")\b",
+    re.IGNORECASE,
+)
 
 
 from interviewapp.qgen_groq import _call_groq_chat
+from django.core.cache import cache
+import hashlib
 import json
 
-def generate_ai_improvement_tips(answer_text, question_text, score):
-    """
-    Generate dynamic improvement tips using LLM.
-    Returns a list of short actionable tips.
-    """
-    prompt = f"""
-You are an expert interview coach.
-
-Question:
-{question_text}
+TIPS_CACHE_TIMEOUT = 60 * 60 * 24 * 7  # identical retakes reuse tips for a week
 
-Candidate Answer:
-{answer_text}
-
-Score: {score}/100
+# Coach instructions are identical for every answer, so they go in the system message
+# where Groq's prefix cache can reuse them; only the Q/A pair varies per call.
+TIPS_SYSTEM_PROMPT = """
+You are an expert interview coach.
 
 TASK:
-Generate 3–5 concise, actionable improvement tips to help the candidate improve.
+Given an interview question, the candidate's answer and its score, generate 3–5 concise,
+actionable improvement tips to help the candidate improve.
 Tips should be:
 - Specific to the answer
 - Practical and short
 - Focused on clarity, structure, depth, and correctness
 
-Return ONLY a JSON array of strings.
+Return ONLY a JSON object of the form {"tips": [...]} where "tips" is an array of strings.
 Example:
-[
+{"tips": [
   "Explain the concept step by step",
   "Add a real-world example",
   "Mention trade-offs clearly"
-]
+]}
+"""
+
+TIPS_TMPL = """
+Question:
+{question}
+
+Candidate Answer:
+{answer}
+
+Score: {score}/100
 """
 
+def generate_ai_improvement_tips(answer_text, question_text, score):
+    """
+    Generate dynamic improvement tips using LLM.
+    Returns a list of short actionable tips.
+    """
+    # hashed directly: signature_of_text is memoized, and full answer texts would only fill its LRU
+    cache_key = "tips:" + hashlib.blake2b(f"{answer_text}|{question_text}".encode("utf-8"), digest_size=16).hexdigest()
+    cached = cache.get(cache_key)
+    if cached is not None:
+        return cached
+
+    prompt = TIPS_TMPL.format_map({"question": question_text, "answer": answer_text, "score": score})
+
     try:
-        response = _call_groq_chat(prompt, model="llama-3.1-8b-instant")
-        start = response.find("[")
-        end = response.rfind("]")
-        tips = json.loads(response[start:end+1])
+        response = _call_groq_chat(prompt, model="llama-3.1-8b-instant", system=TIPS_SYSTEM_PROMPT, json_mode=True)
+        tips = json.loads(response).get("tips")
         if isinstance(tips, list):
+            cache.set(cache_key, tips[:5], TIPS_CACHE_TIMEOUT)
             return tips[:5]
     except Exception:
         pass
 
     return []
 
+def _needs_ai_tips(word_count, score):
+    """
+    Short answers are fully covered by the rule tips, near-empty ones gain nothing from the LLM,
+    and strong answers need no tips; only the middle band is worth a Groq call.
+    """
+    return word_count >= 25 and 30 <= score <= 80
+
 def analyze_transcript(text, question):
     if not text:
         return {
@@ -63,26 +90,22 @@ def analyze_transcript(text, question):
             ]
         }
 
-    doc = nlp(text)
-    tokens = [t.text.lower() for t in doc]
+    fillers = len(FILLER_RE.findall(text))
 
-    fillers = sum(1 for t in tokens if t in FILLERS)
+    text_lower = text.lower()
+    keywords = question.keywords_list if question else ()
+    matched = sum(1 for k in keywords if k in text_lower)
 
-    keywords = []
-    matched = 0
-    if question and question.keywords:
-        keywords = [k.strip().lower() for k in question.keywords.split(',') if k.strip()]
-        matched = sum(1 for k in keywords if k in text.lower())
+    word_count = len(text.split())
 
     # ---- SCORING (internal) ----
     keyword_score = int((matched / max(1, len(keywords))) * 40) if keywords else 20
-    length_score = min(20, max(5, len(text.split())))
+    length_score = min(20, max(5, word_count))
     grammar_score = 25 - min(10, fillers * 2)
     filler_penalty = min(15, fillers * 3)
     total = max(0, keyword_score + length_score + grammar_score - filler_penalty)
 
     # ---- USER-FRIENDLY FEEDBACK ----
-    word_count = len(text.split())
     feedback_parts = []
 
     if word_count < 12:
@@ -123,11 +146,13 @@ def analyze_transcript(text, question):
     rule_tips.append("Add a simple real-world or technical example")
 
     # ---- AI-GENERATED TIPS ----
-    ai_tips = generate_ai_improvement_tips(
-        answer_text=text,
-        question_text=question.text if question else "",
-        score=int(total)
-    )
+    ai_tips = None
+    if _needs_ai_tips(word_count, int(total)):
+        ai_tips = generate_ai_improvement_tips(
+            answer_text=text,
+            question_text=question.text if question else "",
+            score=int(total)
+        )
 
     improvement_tips = ai_tips if ai_tips else rule_tips
 
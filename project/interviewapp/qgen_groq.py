@@ -2,11 +2,17 @@
 import os
 import json
 import time
+import random
 import hashlib
 import logging
 import requests
 import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from requests.adapters import HTTPAdapter
 from typing import List, Dict, Optional
+from django.core.cache import cache
 
 logger = logging.getLogger(__name__)
 logging.basicConfig(level=logging.INFO)
@@ -14,12 +20,38 @@ logging.basicConfig(level=logging.INFO)
 GROQ_API_KEY = os.getenv("GROQ_API_KEY", "")
 GROQ_BASE = "https://api.groq.com/openai/v1"
 GROQ_MODEL = os.getenv("GROQ_MODEL", "llama-3.1-8b-instant")
+_GROQ_ENABLED = bool(GROQ_API_KEY)  # checked once; without a key every call path goes straight to stubs
 
 MAX_RETRIES = 4
+MAX_PARALLEL_CALLS = 4
+MAX_INFLIGHT_CALLS = 8  # process-wide cap on concurrent Groq requests (all threads/views)
+REPLACEMENT_FANOUT = 3  # parallel replacement calls issued by enforce_role_allowed_types
+REPLACEMENT_ROUNDS = 2  # a second round only runs when the first left slots unfilled
 RETRY_BACKOFF = 1.5
+RETRY_MAX_BACKOFF = 30  # seconds, cap for the exponential backoff
 CALL_TIMEOUT = 60  # seconds
+LLM_CACHE_TIMEOUT = 60 * 60 * 24  # deterministic (temperature 0) completions
+QPOOL_MIN_SIZE = 30  # serve sessions from the per-role pool once it holds this many questions
+QPOOL_MAX_SIZE = 100
+QPOOL_TIMEOUT = 60 * 60 * 24 * 7  # a pool expires a week after its last top-up
+QPOOL_TOP_UP_BATCH = 10  # questions requested by one background top-up of a pool below QPOOL_MAX_SIZE
 DEV_FORCE_CREATE = bool(os.getenv("DEV_FORCE_CREATE", False))  # set "True" in .env to force-create during dev
-
+GROQ_DEBUG_DUMP = bool(os.getenv("GROQ_DEBUG_DUMP", False))  # set in .env to dump raw Groq responses to disk
+
+# Shared keep-alive session: repeated Groq calls reuse pooled TCP/TLS connections
+# instead of paying a fresh handshake per requests.post.
+_SESSION = requests.Session()
+_SESSION.mount("https://", HTTPAdapter(pool_connections=10, pool_maxsize=20))
+# bounds in-flight requests so bursts of sessions queue here instead of tripping Groq's rate limit;
+# held only around the HTTP round trip, never across a retry sleep
+_INFLIGHT = threading.BoundedSemaphore(MAX_INFLIGHT_CALLS)
+# background pool top-ups run one at a time off the request path; the set holds the pool keys
+# already queued so a burst of pool hits schedules a single top-up per pool
+_POOL_TOP_UP_EXECUTOR = ThreadPoolExecutor(max_workers=1, thread_name_prefix="qpool")
+_POOL_TOP_UPS = set()
+_POOL_TOP_UPS_LOCK = threading.Lock()
+
+_JSON_DECODER = json.JSONDecoder()
 _NUMERIC_RE = re.compile(r'[-+]?\d[\d,]*(?:\.\d+)?')  # detect numbers, currency, etc.
 
 # Role normalizer and preferences (tune as you like)
@@ -55,9 +87,18 @@ ROLE_ALLOWED_TYPES = {
     "default": {"math", "reasoning"},
 }
 
+@lru_cache(maxsize=4096)
 def signature_of_text(text: str) -> str:
+    # memoized: the same texts (stubs, pooled questions) are hashed again on every session
+    # identity hash for dedup/cache keys only; a 128-bit BLAKE2b digest is plenty and keeps keys short
     norm = " ".join(text.lower().split())
-    return hashlib.sha256(norm.encode("utf-8")).hexdigest()
+    return hashlib.blake2b(norm.encode("utf-8"), digest_size=16).hexdigest()
+
+# currency symbols and math vocabulary, matched as plain substrings of the lowercased text
+_MATH_CUES = ("%", "$", "₹", "rupee",
+              "calculate", "compute", "probability", "percent", "ratio", "sum", "difference",
+              "distance", "speed", "time", "how many", "what is the next number", "series",
+              "expected value", "mean", "median", "mode")
 
 def _is_math_question_textual(text: str) -> bool:
     if not text:
@@ -65,89 +106,141 @@ def _is_math_question_textual(text: str) -> bool:
     t = str(text).lower()
     if _NUMERIC_RE.search(t):
         return True
-    if "%" in t or "$" in t or "₹" in t or "rupee" in t:
-        return True
-    math_words = ("calculate", "compute", "probability", "percent", "ratio", "sum", "difference",
-                  "distance", "speed", "time", "how many", "what is the next number", "series",
-                  "expected value", "mean", "median", "mode")
-    if any(w in t for w in math_words):
-        return True
-    return False
-
-def _build_prompt(role: str, n: int, difficulty: int = 2, math_needed: int = 0) -> str:
-    """
-    Build a JSON-only prompt. If math_needed > 0 we require that many math items in this batch.
-    If math_needed == 0, request zero math items.
-    """
-    math_clause = ""
-    if math_needed > 0:
-        math_clause = f"- Exactly {math_needed} of the {n} items MUST be of type \"math\" and include numeric data.\n"
-    else:
-        math_clause = f"- ZERO items of the {n} items should be of type \"math\".\n"
+    return any(w in t for w in _MATH_CUES)
 
-    return f"""
+# Static instructions shared by every question-generation call. Groq caches identical
+# prompt prefixes, so everything that does not vary per call lives in the system message.
+QGEN_SYSTEM_PROMPT = """
 You are a careful interview question generator.
 
 TASK:
-Generate EXACTLY {n} unique interview questions from "{role}" interviewer commonly asks to candidate and difficulty {difficulty}.
-Return ONLY a JSON array. Each entry MUST be an object with keys:
+Generate EXACTLY the requested number of unique interview questions that an interviewer for the requested role commonly asks a candidate, at the requested difficulty.
+Return ONLY a JSON object of the form {"questions": [...]}. Each entry of "questions" MUST be an object with keys:
   - "text": string - the question text (≤ 300 chars). For math questions include numeric data and a clear ask.
   - "keywords": string - comma-separated keywords.
   - "difficulty": integer 1-5.
   - "type": string - either "math" or "reasoning".
 
 MIX RULE:
-{math_clause}
+- Follow the math quota given in the request exactly.
 - The rest of the items must be of type "reasoning".
 - Ensure variety: do not repeat same template or numeric values.
-- If you cannot meet constraints, return an empty array [].
+- If you cannot meet constraints, return {"questions": []}.
 
 FORMAT RULES:
-- RETURN ONLY the JSON array and NOTHING ELSE (no commentary, no markdown).
+- RETURN ONLY the JSON object and NOTHING ELSE (no commentary, no markdown).
 - Ensure valid JSON (double quotes, no trailing commas).
 
 Examples:
-[
-  {{"text":"A machine produces 120 parts in 8 hours. At the same rate how many parts in 5 hours?","keywords":"rate,proportion","difficulty":2,"type":"math"}},
-  {{"text":"Describe a time you handled conflicting priorities and how you decided.","keywords":"prioritization,tradeoffs","difficulty":3,"type":"reasoning"}}
-]
+{"questions": [
+  {"text":"A machine produces 120 parts in 8 hours. At the same rate how many parts in 5 hours?","keywords":"rate,proportion","difficulty":2,"type":"math"},
+  {"text":"Describe a time you handled conflicting priorities and how you decided.","keywords":"prioritization,tradeoffs","difficulty":3,"type":"reasoning"}
+]}
 
 CONSTRAINTS:
 - Avoid PII or offensive content.
 - Keep questions clear and answerable within 1-5 minutes.
 """
 
-def _call_groq_chat(prompt: str, model: Optional[str] = None, temperature: float = 0.15) -> str:
-    if not GROQ_API_KEY:
+@lru_cache(maxsize=64)
+def _build_prompt(role: str, n: int, difficulty: int = 2, math_needed: int = 0) -> str:
+    """
+    Build the per-call part of the prompt (sent after QGEN_SYSTEM_PROMPT).
+    If math_needed > 0 we require that many math items in this batch.
+    If math_needed == 0, request zero math items.
+    Pure in its arguments, so rendered prompts are memoized per (role, n, difficulty, math_needed).
+    """
+    if math_needed > 0:
+        math_clause = f"Exactly {math_needed} of the {n} items MUST be of type \"math\" and include numeric data."
+    else:
+        math_clause = f"ZERO items of the {n} items should be of type \"math\"."
+
+    return (
+        f'role="{role}" count={n} difficulty={difficulty}\n'
+        f"Math quota: {math_clause}\n"
+        "Return the JSON object only."
+    )
+
+def _dump_groq_response(status, text: str, attempt: int) -> None:
+    # one file per process/attempt so concurrent calls never write the same file
+    path = f"groq_last_response.{os.getpid()}.{attempt}.txt"
+    try:
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(f"STATUS:{status}\n")
+            f.write(text)
+    except Exception:
+        logger.exception("Failed to write %s", path)
+
+class _GroqClientError(RuntimeError):
+    """4xx other than 429 (bad key, bad request): retrying cannot succeed."""
+
+def _retry_delay(attempt: int) -> float:
+    # exponential backoff with full jitter so concurrent callers do not retry in lockstep
+    return random.uniform(0, min(RETRY_MAX_BACKOFF, RETRY_BACKOFF * 2 ** attempt))
+
+def _call_groq_chat(prompt: str, model: Optional[str] = None, temperature: float = 0.15,
+                    system: Optional[str] = None, json_mode: bool = False,
+                    deadline: Optional[float] = None) -> str:
+    """
+    One chat completion, retried on transient failures. With a deadline (a time.monotonic()
+    value) no attempt starts, and no backoff sleeps, past it: the call raises TimeoutError instead.
+    """
+    if not _GROQ_ENABLED:
         raise RuntimeError("GROQ_API_KEY not set")
     url = f"{GROQ_BASE}/chat/completions"
     body = {
         "model": model or GROQ_MODEL,
         "messages": [
-            {"role": "system", "content": "You are an interview question generator."},
+            {"role": "system", "content": system or "You are an interview question generator."},
             {"role": "user", "content": prompt}
         ],
         "temperature": temperature,
         "max_tokens": 1000,
         "top_p": 0.95,
     }
+    if json_mode:
+        # native JSON mode: the model can only emit a syntactically valid JSON object
+        body["response_format"] = {"type": "json_object"}
     headers = {"Authorization": f"Bearer {GROQ_API_KEY}", "Content-Type": "application/json"}
 
+    # temperature 0 makes the completion a function of the request body, so it can be cached
+    cache_key = None
+    if temperature == 0:
+        body_json = json.dumps(body, sort_keys=True, ensure_ascii=False)
+        cache_key = "groq:" + hashlib.blake2b(body_json.encode("utf-8"), digest_size=16).hexdigest()
+        cached = cache.get(cache_key)
+        logger.debug("Groq cache %s key=%s", "hit" if cached is not None else "miss", cache_key)
+        if cached is not None:
+            return cached
+
     last_exc = None
     for attempt in range(1, MAX_RETRIES + 1):
+        timeout = CALL_TIMEOUT
+        if deadline is not None:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise TimeoutError("Groq call deadline passed") from last_exc
+            timeout = min(CALL_TIMEOUT, remaining)
         try:
             logger.info("Groq call attempt %s model=%s", attempt, body["model"])
-            resp = requests.post(url, headers=headers, json=body, timeout=CALL_TIMEOUT)
+            if not _INFLIGHT.acquire(timeout=timeout if deadline is not None else None):
+                raise TimeoutError("No free Groq call slot before the deadline")
+            try:
+                resp = _SESSION.post(url, headers=headers, json=body, timeout=timeout)
+            finally:
+                _INFLIGHT.release()
             status = getattr(resp, "status_code", None)
             text = resp.text or ""
             logger.info("Groq status %s (len=%s)", status, len(text))
-            # save raw response for debugging
-            try:
-                with open("groq_last_response.txt", "w", encoding="utf-8") as f:
-                    f.write(f"STATUS:{status}\n")
-                    f.write(text)
-            except Exception:
-                logger.exception("Failed to write groq_last_response.txt")
+            # save raw response for debugging (off the hot path unless explicitly enabled)
+            if GROQ_DEBUG_DUMP:
+                _dump_groq_response(status, text, attempt)
+
+            # rate limits and server errors are transient; other 4xx are permanent
+            if status is not None and status >= 400:
+                if status == 429 or status >= 500:
+                    raise RuntimeError(f"Groq returned HTTP {status}")
+                raise _GroqClientError(f"Groq returned HTTP {status}: {text[:300]}")
 
             # try to extract content in common shapes
             try:
@@ -173,56 +266,97 @@ def _call_groq_chat(prompt: str, model: Optional[str] = None, temperature: float
 
             if not content:
                 raise RuntimeError("Empty content returned by Groq")
+            if cache_key:
+                cache.set(cache_key, content, LLM_CACHE_TIMEOUT)
             return content
+        except _GroqClientError:
+            raise
         except Exception as e:
             last_exc = e
             logger.exception("Groq call failed (attempt %s): %s", attempt, e)
-            time.sleep(RETRY_BACKOFF * attempt)
+            if attempt < MAX_RETRIES:
+                delay = _retry_delay(attempt)
+                if deadline is not None:
+                    delay = min(delay, max(0.0, deadline - time.monotonic()))
+                time.sleep(delay)
     raise last_exc or RuntimeError("Groq call failed after retries")
 
+def _call_groq_chat_many(prompts: List[str], **kwargs) -> list:
+    """
+    Run independent Groq calls concurrently over the pooled session.
+    Returns one entry per prompt, in order: the content string, or the exception that call raised.
+    """
+    def _one(prompt):
+        try:
+            return _call_groq_chat(prompt, **kwargs)
+        except Exception as e:
+            return e
+
+    if len(prompts) <= 1:
+        return [_one(p) for p in prompts]
+    with ThreadPoolExecutor(max_workers=min(MAX_PARALLEL_CALLS, len(prompts))) as pool:
+        return list(pool.map(_one, prompts))
+
 def _extract_json_array_from_text(text: str) -> List[Dict]:
-    start = text.find("[")
-    end = text.rfind("]")
-    if start == -1 or end == -1 or end <= start:
-        logger.warning("No JSON array found in model text. Snippet: %s", text[:1000])
-        raise ValueError("No JSON array found in model output; see groq_last_response.txt")
-    raw = text[start:end+1]
+    # JSON-mode responses are a bare {"questions": [...]} object
     try:
-        parsed = json.loads(raw)
-    except Exception as e:
-        logger.exception("JSON parse error for raw (len=%s): %s", len(raw), e)
-        raise
-    if not isinstance(parsed, list):
-        raise ValueError("Parsed JSON is not a list")
-    return parsed
+        parsed = json.loads(text)
+    except ValueError:
+        parsed = None
+    if isinstance(parsed, dict) and isinstance(parsed.get("questions"), list):
+        return parsed["questions"]
+    if isinstance(parsed, list):
+        return parsed
+
+    # otherwise decode from each "[" in turn: a stray bracket in a preamble is skipped, and
+    # raw_decode stops at the end of the first complete array instead of a later "]"
+    start = text.find("[")
+    while start != -1:
+        try:
+            parsed, _ = _JSON_DECODER.raw_decode(text, start)
+        except ValueError:
+            parsed = None
+        if isinstance(parsed, list):
+            return parsed
+        start = text.find("[", start + 1)
+
+    logger.warning("No JSON array found in model text. Snippet: %s", text[:1000])
+    raise ValueError("No JSON array found in model output; set GROQ_DEBUG_DUMP to capture raw responses")
 
 def _validate_question_obj(obj: dict) -> Optional[dict]:
     """
     Validate basic fields and ensure a 'type' is present (infer if missing).
-    Returns normalized dict with keys: text, keywords, difficulty, type
+    Returns normalized dict with keys: text, keywords, difficulty, type, is_math
     """
     if not isinstance(obj, dict):
         return None
     text = obj.get("text")
-    keywords = obj.get("keywords", "")
-    difficulty = obj.get("difficulty", 3)
-    qtype = obj.get("type", "").lower() if obj.get("type") else ""
+    # reject before touching the other fields
     if not text or not isinstance(text, str):
         return None
-    try:
-        difficulty = int(difficulty)
-        difficulty = max(1, min(5, difficulty))
-    except Exception:
-        difficulty = 3
+    difficulty = obj.get("difficulty", 3)
+    if type(difficulty) is not int:  # the model usually sends an int; only coerce otherwise
+        try:
+            difficulty = int(difficulty)
+        except Exception:
+            difficulty = 3
+    difficulty = 1 if difficulty < 1 else 5 if difficulty > 5 else difficulty
     # normalize keywords
+    keywords = obj.get("keywords", "")
     if isinstance(keywords, list):
         keywords = ",".join(str(k).strip() for k in keywords if k)
     else:
         keywords = str(keywords).strip()
-    # infer type if missing or invalid
-    if qtype not in ("math", "reasoning"):
-        qtype = "math" if _is_math_question_textual(text) else "reasoning"
-    return {"text": text.strip(), "keywords": keywords, "difficulty": difficulty, "type": qtype}
+    # infer type if missing or invalid; classify once and keep the verdict on the item
+    qtype = obj.get("type")
+    qtype = qtype.lower() if isinstance(qtype, str) else ""
+    if qtype == "math":
+        is_math = True
+    else:
+        is_math = _is_math_question_textual(text)
+        if qtype != "reasoning":
+            qtype = "math" if is_math else "reasoning"
+    return {"text": text.strip(), "keywords": keywords, "difficulty": difficulty, "type": qtype, "is_math": is_math}
 
 def _ensure_math_has_number(qobj: dict) -> dict:
     """
@@ -249,11 +383,14 @@ def _is_math_question(qobj: dict) -> bool:
     """
     if not isinstance(qobj, dict):
         return False
+    if "is_math" in qobj:  # already classified by _validate_question_obj
+        return qobj["is_math"]
     if qobj.get("type") == "math":
         return True
     return _is_math_question_textual(qobj.get("text", ""))
 
-def enforce_role_allowed_types(role_key: str, collected: list, n: int, difficulty: int = 3, model: Optional[str] = None) -> list:
+def enforce_role_allowed_types(role_key: str, collected: list, n: int, difficulty: int = 3, model: Optional[str] = None,
+                               deadline: Optional[float] = None) -> list:
     """
     Remove disallowed types for the role and try to replace them by targeted LLM calls.
     Returns a list (<= n) of allowed items.
@@ -269,47 +406,112 @@ def enforce_role_allowed_types(role_key: str, collected: list, n: int, difficult
             continue
         kept.append(q)
 
-    attempts = 0
-    max_attempts = max(2, removed_slots * 3)
+    if removed_slots <= 0:
+        return kept[:n]
 
-    while removed_slots > 0 and attempts < max_attempts:
-        attempts += 1
-        # request exactly removed_slots items with math_needed=0 (i.e., only reasoning)
-        prompt = _build_prompt(role=role_key.capitalize(), n=removed_slots, difficulty=difficulty, math_needed=0)
-        try:
-            out = _call_groq_chat(prompt, model=model)
-            parsed = _extract_json_array_from_text(out)
-        except Exception as e:
-            logger.exception("Replacement call failed: %s", e)
-            break
+    seen_sigs = set(q.get("signature") or signature_of_text(q["text"]) for q in kept)
+    rounds = 0
 
-        for obj in parsed:
-            v = _validate_question_obj(obj)
-            if not v:
-                continue
-            # skip math if still returned erroneously
-            if _is_math_question(v) and "math" not in allowed:
-                continue
-            v = _ensure_math_has_number(v)
-            kept.append(v)
-            removed_slots -= 1
+    while removed_slots > 0 and rounds < REPLACEMENT_ROUNDS:
+        rounds += 1
+        # split the shortfall across up to REPLACEMENT_FANOUT parallel calls (math_needed=0, i.e. only
+        # reasoning); together they ask for about removed_slots items, not removed_slots each
+        calls = min(REPLACEMENT_FANOUT, removed_slots)
+        per_call = -(-removed_slots // calls)
+        prompt = _build_prompt(role=role_key.capitalize(), n=per_call, difficulty=difficulty, math_needed=0)
+        outs = _call_groq_chat_many([prompt] * calls, model=model, system=QGEN_SYSTEM_PROMPT, json_mode=True,
+                                    deadline=deadline)
+        added = 0
+
+        for out in outs:
             if removed_slots <= 0:
                 break
+            try:
+                if isinstance(out, Exception):
+                    raise out
+                parsed = _extract_json_array_from_text(out)
+            except Exception as e:
+                logger.exception("Replacement call failed: %s", e)
+                continue
+
+            for obj in parsed:
+                v = _validate_question_obj(obj)
+                if not v:
+                    continue
+                # skip math if still returned erroneously
+                if _is_math_question(v) and "math" not in allowed:
+                    continue
+                v = _ensure_math_has_number(v)
+                v["signature"] = signature_of_text(v["text"])
+                # parallel responses can overlap each other and the kept items
+                if v["signature"] in seen_sigs:
+                    continue
+                seen_sigs.add(v["signature"])
+                kept.append(v)
+                added += 1
+                removed_slots -= 1
+                if removed_slots <= 0:
+                    break
+
+        if not added:
+            break  # every call failed or repeated itself; another round would too
 
     return kept[:n]
 
-def generate_questions_groq(role: str, n: int = 5, difficulty: int = 3, model: Optional[str] = None) -> List[dict]:
+def _question_pool_key(role_key: str, difficulty: int, model: Optional[str] = None) -> str:
+    # keyed by model too: a caller pinning another model must not be served this one's questions
+    return f"qpool:{model or GROQ_MODEL}:{role_key}:{difficulty}"
+
+def _sample_question_pool(pool: List[dict], n: int, math_needed: int, exclude_signatures=frozenset()) -> Optional[List[dict]]:
     """
-    Generate up to n validated question dicts with role-aware math/reasoning constraints.
+    Draw n distinct vetted questions from a (role, difficulty, model) pool, honouring the math quota
+    as far as the pool allows and preferring questions whose signature is not in exclude_signatures.
+    Returns None while the pool is too small to serve from.
+    """
+    if len(pool) < max(n, QPOOL_MIN_SIZE):
+        return None
+    math_items = [q for q in pool if q.get("is_math")]
+    other_items = [q for q in pool if not q.get("is_math")]
+    k_math = min(math_needed, len(math_items))
+    if len(other_items) < n - k_math:
+        return None
+    picked = _sample_preferring_unseen(math_items, k_math, exclude_signatures)
+    picked += _sample_preferring_unseen(other_items, n - k_math, exclude_signatures)
+    random.shuffle(picked)
+    return [dict(q) for q in picked]
+
+def _sample_preferring_unseen(items: List[dict], k: int, exclude_signatures) -> List[dict]:
+    unseen = [q for q in items if q["signature"] not in exclude_signatures]
+    if len(unseen) >= k:
+        return random.sample(unseen, k)
+    seen = [q for q in items if q["signature"] in exclude_signatures]
+    return unseen + random.sample(seen, k - len(unseen))
+
+def _add_to_question_pool(role_key: str, difficulty: int, model: Optional[str], questions: List[dict]) -> None:
+    # only LLM-generated, role-checked items go in; stubs are added after this point
+    if not questions:
+        return
+    key = _question_pool_key(role_key, difficulty, model)
+    pool = cache.get(key) or []
+    known = set(q["signature"] for q in pool)
+    pool.extend(dict(q) for q in questions if q.get("signature") and q["signature"] not in known)
+    cache.set(key, pool[-QPOOL_MAX_SIZE:], QPOOL_TIMEOUT)
+
+def _llm_question_rounds(role: str, role_key: str, n: int, difficulty: int, model: Optional[str],
+                         deadline: Optional[float] = None) -> List[dict]:
+    """
+    Up to n LLM questions honouring the role's math quota and allowed types; the result is
+    added to the question pool. Returns [] without an API key, and whatever it has once
+    the deadline (a time.monotonic() value) passes.
     """
-    role_key = _normalize_role_key(role)
     math_ratio = ROLE_MATH_RATIO.get(role_key, ROLE_MATH_RATIO["default"])
     math_needed_total = max(0, int(round(n * math_ratio)))
 
     collected = []
     seen_sigs = set()
     attempts = 0
-    max_attempts = max(3, n * 3)
+    # without an API key skip the LLM rounds entirely and fall through to stubs
+    max_attempts = max(3, n * 3) if _GROQ_ENABLED else 0
     math_count = 0
 
     while len(collected) < n and attempts < max_attempts:
@@ -323,7 +525,8 @@ def generate_questions_groq(role: str, n: int = 5, difficulty: int = 3, model: O
         prompt = _build_prompt(role=role.capitalize(), n=remaining, difficulty=difficulty, math_needed=math_for_this_call)
 
         try:
-            out = _call_groq_chat(prompt, model=model, temperature=0.2)
+            out = _call_groq_chat(prompt, model=model, temperature=0.2, system=QGEN_SYSTEM_PROMPT, json_mode=True,
+                                  deadline=deadline)
         except Exception as e:
             logger.exception("Groq call failed: %s", e)
             break
@@ -343,6 +546,7 @@ def generate_questions_groq(role: str, n: int = 5, difficulty: int = 3, model: O
             if sig in seen_sigs:
                 continue
             seen_sigs.add(sig)
+            v["signature"] = sig
             collected.append(v)
             if v.get("type") == "math":
                 math_count += 1
@@ -359,13 +563,59 @@ def generate_questions_groq(role: str, n: int = 5, difficulty: int = 3, model: O
                     removed += 1
                     continue
                 filtered.append(q)
-            collected = filtered
-            math_count = len([q for q in collected if q.get("type") == "math"])
-            seen_sigs = set(signature_of_text(q["text"]) for q in collected)
+            collected = filtered  # only non-math items were dropped, so math_count still holds
+            seen_sigs = set(q["signature"] for q in collected)
 
     # Final enforcement: remove disallowed types and attempt targeted replacements if needed
     final = collected[:n]
-    final = enforce_role_allowed_types(role_key, final, n, difficulty=difficulty, model=model)
+    final = enforce_role_allowed_types(role_key, final, n, difficulty=difficulty, model=model, deadline=deadline)
+    _add_to_question_pool(role_key, difficulty, model, final)
+    return final
+
+def _schedule_pool_top_up(role: str, role_key: str, difficulty: int, model: Optional[str]) -> None:
+    """Queue one background LLM round for a pool below QPOOL_MAX_SIZE (at most one per pool at a time)."""
+    key = _question_pool_key(role_key, difficulty, model)
+    with _POOL_TOP_UPS_LOCK:
+        if key in _POOL_TOP_UPS:
+            return
+        _POOL_TOP_UPS.add(key)
+
+    def _top_up():
+        try:
+            _llm_question_rounds(role, role_key, QPOOL_TOP_UP_BATCH, difficulty, model)
+        except Exception as e:
+            logger.exception("Question pool top-up failed for %s: %s", key, e)
+        finally:
+            with _POOL_TOP_UPS_LOCK:
+                _POOL_TOP_UPS.discard(key)
+
+    _POOL_TOP_UP_EXECUTOR.submit(_top_up)
+
+def generate_questions_groq(role: str, n: int = 5, difficulty: int = 3, model: Optional[str] = None,
+                            exclude_signatures=frozenset(), deadline: Optional[float] = None) -> List[dict]:
+    """
+    Generate up to n validated question dicts with role-aware math/reasoning constraints.
+    Each dict carries its precomputed "signature" so callers can dedup/persist in bulk.
+    Served from the cached (role, difficulty, model) question pool when it is warm, preferring
+    questions not in exclude_signatures (e.g. ones the user was already given); a pool below
+    QPOOL_MAX_SIZE is topped up by a background LLM round, and every LLM round adds to it.
+    A deadline (a time.monotonic() value) bounds the Groq calls, retries and backoff included;
+    slots still empty when it passes are filled with stubs.
+    """
+    role_key = _normalize_role_key(role)
+    math_ratio = ROLE_MATH_RATIO.get(role_key, ROLE_MATH_RATIO["default"])
+    math_needed_total = max(0, int(round(n * math_ratio)))
+
+    # most sessions are served from the warm pool without waiting on Groq
+    pool = cache.get(_question_pool_key(role_key, difficulty, model)) or []
+    pooled = _sample_question_pool(pool, n, math_needed_total, exclude_signatures)
+    if pooled:
+        if len(pool) < QPOOL_MAX_SIZE and _GROQ_ENABLED:
+            _schedule_pool_top_up(role, role_key, difficulty, model)
+        return pooled
+
+    final = _llm_question_rounds(role, role_key, n, difficulty, model, deadline=deadline)
+    seen_sigs = set(q["signature"] for q in final)
 
     # If still fewer than n, fill with safe stubs
     if len(final) < n:
@@ -386,7 +636,8 @@ def generate_questions_groq(role: str, n: int = 5, difficulty: int = 3, model: O
                 "text": stub.get("text", "").strip(),
                 "keywords": stub.get("keywords", ""),
                 "difficulty": stub.get("difficulty", 3),
-                "type": "math" if _is_math_question_textual(stub.get("text", "")) else "reasoning"
+                "type": "math" if _is_math_question_textual(stub.get("text", "")) else "reasoning",
+                "signature": sig,
             })
 
     # Trim to exactly n and return
@@ -422,7 +673,8 @@ Rules:
 Return valid JSON only.
 """
     try:
-        out = _call_groq_chat(prompt, model=model, temperature=0.2)
+        # temperature 0: the same answers always get the same coaching, and the response is cacheable
+        out = _call_groq_chat(prompt, model=model, temperature=0.0)
         # extract first JSON object in response
         start = out.find("{")
         end = out.rfind("}")
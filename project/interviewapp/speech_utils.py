@@ -1,7 +1,15 @@
+from functools import lru_cache
+
 import whisper
 
-model = whisper.load_model("base")  # small / base is fine
+
+@lru_cache(maxsize=1)
+def get_whisper_model():
+    # loaded on first transcription, then shared by every request in this process
+    return whisper.load_model("base")  # small / base is fine
 
 def transcribe_audio(audio_path):
-    result = model.transcribe(audio_path)
+    model = get_whisper_model()
+    # half precision only where it is supported (GPU); on CPU whisper would warn and fall back to fp32
+    result = model.transcribe(audio_path, fp16=model.device.type == "cuda")
     return result.get("text", "").strip()
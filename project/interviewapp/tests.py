@@ -1,3 +1,366 @@
-from django.test import TestCase
+import itertools
+import json
+import random
+import re
+import threading
+import time
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import IntegrityError, connection, transaction
+from django.db.migrations.executor import MigrationExecutor
+from django.test import TestCase, TransactionTestCase
+
+from . import nlp_utils, qgen_groq, views
+from .models import Answer, GeneratedQuestion, InterviewSession
+from .views_helpers import _TEMPLATES
+
+
+class StartSessionTests(TestCase):
+    def setUp(self):
+        random.seed(0)  # stub generation is randomized
+        self.user = User.objects.create_user("candidate", password="Passw0rd!")
+        self.client.force_login(self.user)
+
+    def _start(self, role, n, llm_questions):
+        with mock.patch.object(views, "generate_questions_groq", return_value=llm_questions):
+            response = self.client.post("/start/", {"role": role, "n_questions": n})
+        self.assertEqual(response.status_code, 302)
+        return InterviewSession.objects.latest("id")
+
+    def test_stub_fill_is_not_cut_short_by_repeats(self):
+        # no LLM output: every slot comes from the randomized stubs, which repeat often
+        session = self._start("hr", 10, [])
+
+        self.assertEqual(session.total_questions, 10)
+        self.assertEqual(session.answers.values("question").distinct().count(), 10)
+
+    def test_stub_fill_stops_once_the_role_templates_are_used_up(self):
+        # behavioural stubs have no placeholders: only 5 distinct texts exist for 20 slots
+        with mock.patch.object(views, "generate_question_stub", wraps=views.generate_question_stub) as stub:
+            session = self._start("beh", 20, [])
+
+        self.assertEqual(session.total_questions, 5)
+        self.assertLess(stub.call_count, 50)  # max_attempts would allow 200 draws
+
+    def test_stubs_colliding_with_llm_questions_are_redrawn(self):
+        # the LLM returned 4 of the 5 behavioural stub texts, so only one stub can still be added
+        llm = [{"text": t, "keywords": "situation", "difficulty": 3} for t in _TEMPLATES['beh'][:4]]
+        session = self._start("beh", 5, llm)
+
+        self.assertEqual(session.total_questions, 5)
+        texts = list(session.answers.order_by("index").values_list("question__text", flat=True))
+        self.assertEqual(texts[:4], list(_TEMPLATES['beh'][:4]))
+        self.assertEqual(texts[4], _TEMPLATES['beh'][4])
+
+
+class HungGeneration:
+    """Stands in for generate_questions_groq: blocks like a Groq outage until released."""
+
+    def __init__(self):
+        self.release = threading.Event()
+        self.deadlines = []
+        self.finished = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, role, n=5, deadline=None, **kwargs):
+        with self._lock:
+            self.deadlines.append(deadline)
+        self.release.wait(timeout=10)
+        with self._lock:
+            self.finished += 1
+        return []
+
+    def wait_finished(self):
+        for _ in range(200):
+            if self.finished == len(self.deadlines):
+                return
+            time.sleep(0.01)
+
+
+class QuestionGenerationBacklogTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user("candidate", password="Passw0rd!")
+        self.client.force_login(self.user)
+
+    def _start(self):
+        return self.client.post("/start/", {"role": "tech", "n_questions": 3})
+
+    def test_timed_out_generation_falls_back_and_is_bounded_by_a_deadline(self):
+        hung = HungGeneration()
+        try:
+            with mock.patch.object(views, "generate_questions_groq", hung), \
+                    mock.patch.object(views, "QGEN_DEADLINE", 0.05), \
+                    mock.patch.object(views, "QGEN_GRACE", 0.05):
+                response = self._start()
+                after = time.monotonic()
+        finally:
+            hung.release.set()
+            hung.wait_finished()
+
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(InterviewSession.objects.get().total_questions, 3)
+        self.assertEqual(len(hung.deadlines), 1)
+        # the abandoned job is told to give up shortly after the request stopped waiting
+        self.assertLessEqual(hung.deadlines[0], after + 0.1)
+
+    def test_queued_generations_are_cancelled_and_slots_come_back(self):
+        hung = HungGeneration()
+        posts = views.QGEN_MAX_PENDING + 1
+        try:
+            with mock.patch.object(views, "generate_questions_groq", hung), \
+                    mock.patch.object(views, "QGEN_DEADLINE", 0.05):
+                for _ in range(posts):
+                    self.assertEqual(self._start().status_code, 302)
+            started = len(hung.deadlines)
+        finally:
+            hung.release.set()
+            hung.wait_finished()
+
+        # only as many jobs as there are workers ever ran; the ones queued behind them never will
+        self.assertLess(started, posts)
+        time.sleep(0.05)
+        self.assertEqual(len(hung.deadlines), started)
+
+        generate = mock.Mock(return_value=[])
+        with mock.patch.object(views, "generate_questions_groq", generate):
+            self._start()
+        generate.assert_called_once()  # every slot was released, so this one was submitted
+
+
+class GroqDeadlineTests(TestCase):
+    def test_outage_stops_retrying_at_the_deadline(self):
+        cache.clear()
+
+        def unreachable(*args, **kwargs):
+            time.sleep(0.05)
+            raise ConnectionError("Groq unreachable")
+
+        with mock.patch.object(qgen_groq, "_GROQ_ENABLED", True), \
+                mock.patch.object(qgen_groq._SESSION, "post", side_effect=unreachable) as post:
+            before = time.monotonic()
+            questions = qgen_groq.generate_questions_groq("Developer", n=3, deadline=before + 0.3)
+            elapsed = time.monotonic() - before
+
+        self.assertLess(elapsed, 1)  # not MAX_RETRIES attempts with up to RETRY_MAX_BACKOFF between them
+        self.assertLessEqual(post.call_count, qgen_groq.MAX_RETRIES)
+        self.assertEqual(len(questions), 3)  # stub-filled
+
+
+def _letters(i):
+    # digit-free labels: numbers in a question text would make it count as math
+    return "".join(chr(ord("a") + int(d)) for d in str(i))
+
+
+class FakeGroq:
+    """Stands in for _call_groq_chat: answers each prompt with `count` fresh reasoning questions."""
+
+    def __init__(self):
+        self.prompts = []
+        self._ids = itertools.count()
+        self._lock = threading.Lock()
+
+    def __call__(self, prompt, **kwargs):
+        count = int(re.search(r"count=(\d+)", prompt).group(1))
+        with self._lock:
+            self.prompts.append(prompt)
+            ids = [next(self._ids) for _ in range(count)]
+        return json.dumps({"questions": [
+            {"text": f"Describe design choice {_letters(i)}.", "keywords": "design", "difficulty": 3, "type": "reasoning"}
+            for i in ids
+        ]})
+
+
+class ReplacementFanoutTests(TestCase):
+    def _enforce(self, n_math, n_kept):
+        collected = [qgen_groq._validate_question_obj({"text": f"What is {i} + {i}?", "type": "math"}) for i in range(n_math)]
+        collected += [qgen_groq._validate_question_obj({"text": f"Explain idea {_letters(i)}.", "type": "reasoning"}) for i in range(n_kept)]
+        fake = FakeGroq()
+        with mock.patch.object(qgen_groq, "_call_groq_chat", fake):
+            result = qgen_groq.enforce_role_allowed_types("technical", collected, n_math + n_kept)
+        return result, fake.prompts
+
+    def test_shortfall_is_split_across_parallel_calls(self):
+        result, prompts = self._enforce(n_math=4, n_kept=1)
+
+        self.assertEqual(len(prompts), 3)
+        self.assertTrue(all("count=2" in p for p in prompts))  # ceil(4 / 3) each, not 4 each
+        self.assertEqual(len(result), 5)
+        self.assertFalse(any(q["is_math"] for q in result))
+
+    def test_single_slot_needs_a_single_call(self):
+        result, prompts = self._enforce(n_math=1, n_kept=4)
+
+        self.assertEqual(len(prompts), 1)
+        self.assertIn("count=1", prompts[0])
+        self.assertEqual(len(result), 5)
+
+
+class QuestionPoolTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.key = qgen_groq._question_pool_key("beh", 3)
+        cache.set(self.key, [
+            {"text": f"Pooled question {_letters(i)}?", "keywords": "situation", "difficulty": 3,
+             "type": "reasoning", "is_math": False, "signature": f"pool-{i}"}
+            for i in range(qgen_groq.QPOOL_MIN_SIZE)
+        ])
+
+    def test_pool_hit_tops_up_the_pool_in_the_background(self):
+        with mock.patch.object(qgen_groq, "_GROQ_ENABLED", True), \
+                mock.patch.object(qgen_groq, "_call_groq_chat", FakeGroq()):
+            questions = qgen_groq.generate_questions_groq("Behavioral", n=5, difficulty=3)
+            self.assertTrue(all(q["signature"].startswith("pool-") for q in questions))
+
+            target = qgen_groq.QPOOL_MIN_SIZE + qgen_groq.QPOOL_TOP_UP_BATCH
+            deadline = time.monotonic() + 5
+            while len(cache.get(self.key)) < target and time.monotonic() < deadline:
+                time.sleep(0.01)
+        self.assertEqual(len(cache.get(self.key)), target)
+
+    def test_pool_prefers_questions_not_yet_given(self):
+        given = frozenset(f"pool-{i}" for i in range(25))
+        questions = qgen_groq.generate_questions_groq("Behavioral", n=5, difficulty=3, exclude_signatures=given)
+
+        self.assertEqual({q["signature"] for q in questions}, {f"pool-{i}" for i in range(25, 30)})
+
+    def test_pool_is_not_shared_across_models(self):
+        questions = qgen_groq.generate_questions_groq("Behavioral", n=5, difficulty=3, model="another-model")
+
+        self.assertFalse(any(q["signature"].startswith("pool-") for q in questions))
+
+
+class ImprovementTipsTests(TestCase):
+    def test_tips_cache_key_does_not_fill_the_signature_memo(self):
+        cache.clear()
+        qgen_groq.signature_of_text.cache_clear()
+        response = json.dumps({"tips": ["Add an example"]})
+        with mock.patch.object(nlp_utils, "_call_groq_chat", return_value=response) as call:
+            for _ in range(2):
+                tips = nlp_utils.generate_ai_improvement_tips("A long answer text", "Question?", 50)
+
+        self.assertEqual(tips, ["Add an example"])
+        call.assert_called_once()  # the second call is served from the tips cache
+        self.assertEqual(qgen_groq.signature_of_text.cache_info().currsize, 0)
+
+
+class SessionReportTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user("candidate", password="Passw0rd!")
+        self.client.force_login(self.user)
+        self.session = InterviewSession.objects.create(user=self.user, role="tech", total_questions=10)
+        for i in range(1, 11):
+            q = GeneratedQuestion.objects.create(role="tech", text=f"Question {i}?", signature=f"sig-{i}")
+            Answer.objects.create(
+                session=self.session, question=q, index=i, answer_text="An answer",
+                score=50, feedback="Well explained.", processed=True,
+            )
+        self.session.total_score = 50
+        self.session.save(update_fields=["total_score"])
+
+    def test_summary_query_count_does_not_grow_with_answers(self):
+        with mock.patch.object(views, "generate_session_suggestions", return_value={}):
+            # auth session + user, the session, its owner, then the answers in one query
+            with self.assertNumQueries(5):
+                response = self.client.get(f"/session/{self.session.id}/summary/")
+        self.assertEqual(response.status_code, 200)
+
+    def test_report_query_count_does_not_grow_with_answers(self):
+        # auth session + user, the session, its owner, then the answers in one query
+        with self.assertNumQueries(5):
+            response = self.client.get(f"/session/{self.session.id}/download/")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Type"], "application/pdf")
+
+
+class SkipQuestionTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user("candidate", password="Passw0rd!")
+        self.client.force_login(self.user)
+
+    def test_skip_appends_after_existing_answers(self):
+        session = InterviewSession.objects.create(user=self.user, role="tech", total_questions=3)
+        for i in range(1, 4):
+            q = GeneratedQuestion.objects.create(role="tech", text=f"Question {i}?", signature=f"sig-{i}")
+            Answer.objects.create(session=session, question=q, index=i)
+        spare = GeneratedQuestion.objects.create(role="tech", text="Spare question?", signature="sig-spare")
+
+        response = self.client.get(f"/session/{session.id}/skip/")
+
+        self.assertEqual(response.status_code, 302)
+        session.refresh_from_db()
+        self.assertEqual(session.total_questions, 4)
+        skipped = session.answers.get(question=spare)
+        self.assertEqual(skipped.index, 4)
+        self.assertEqual(skipped.answer_text, "[Skipped]")
+        self.assertEqual(list(session.answers.order_by("index").values_list("index", flat=True)), [1, 2, 3, 4])
+
+
+class NextQuestionTests(TestCase):
+    def test_next_question_loads_answer_and_question_in_one_query(self):
+        user = User.objects.create_user("candidate", password="Passw0rd!")
+        self.client.force_login(user)
+        session = InterviewSession.objects.create(user=user, role="tech", total_questions=1)
+        q = GeneratedQuestion.objects.create(role="tech", text="Question?", signature="sig")
+        Answer.objects.create(session=session, question=q, index=1)
+
+        # auth session + user, the session, its owner, the next answer, the current_index update
+        with self.assertNumQueries(6):
+            response = self.client.get(f"/session/{session.id}/next/")
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, "Question?")
+
+
+class MergeDuplicateSignaturesMigrationTests(TransactionTestCase):
+    migrate_from = [('interviewapp', '0011_generatedquestion_role_id_index')]
+    migrate_to = [('interviewapp', '0012_unique_question_signature')]
+
+    def _migrate(self, targets):
+        executor = MigrationExecutor(connection)
+        executor.loader.build_graph()
+        executor.migrate(targets)
+        return executor.loader.project_state(targets).apps
+
+    def tearDown(self):
+        executor = MigrationExecutor(connection)
+        self._migrate(executor.loader.graph.leaf_nodes())
+
+    def test_duplicates_are_merged_into_the_oldest_row(self):
+        apps = self._migrate(self.migrate_from)
+        User = apps.get_model('auth', 'User')
+        Question = apps.get_model('interviewapp', 'GeneratedQuestion')
+        Session = apps.get_model('interviewapp', 'InterviewSession')
+        Answer = apps.get_model('interviewapp', 'Answer')
+        SessionQuestion = apps.get_model('interviewapp', 'SessionQuestion')
+
+        session = Session.objects.create(user=User.objects.create(username="candidate"))
+        keep = Question.objects.create(text="Question?", signature="dup")
+        dup1 = Question.objects.create(text="Question?", signature="dup")
+        dup2 = Question.objects.create(text="question?", signature="dup")
+        other = Question.objects.create(text="Other?", signature="other")
+        blank1 = Question.objects.create(text="Unsigned?", signature="")
+        blank2 = Question.objects.create(text="Unsigned?", signature="")
+        Answer.objects.create(session=session, question=dup1, index=1)
+        Answer.objects.create(session=session, question=dup2, index=2)
+        Answer.objects.create(session=session, question=other, index=3)
+        SessionQuestion.objects.create(session=session, question=dup2, order=1)
+
+        apps = self._migrate(self.migrate_to)
+        Question = apps.get_model('interviewapp', 'GeneratedQuestion')
+        Answer = apps.get_model('interviewapp', 'Answer')
+        SessionQuestion = apps.get_model('interviewapp', 'SessionQuestion')
+
+        self.assertEqual(
+            set(Question.objects.values_list('id', flat=True)),
+            {keep.id, other.id, blank1.id, blank2.id},  # blank signatures are left alone
+        )
+        self.assertEqual(
+            list(Answer.objects.order_by('index').values_list('question_id', flat=True)),
+            [keep.id, keep.id, other.id],
+        )
+        self.assertEqual(list(SessionQuestion.objects.values_list('question_id', flat=True)), [keep.id])
+
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            Question.objects.create(text="Question?", signature="dup")
+        Question.objects.create(text="Unsigned?", signature="")  # the constraint skips blanks
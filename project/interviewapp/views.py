@@ -2,29 +2,27 @@
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth import authenticate, login, logout
 from django.contrib.auth.decorators import login_required
-from django.http import HttpResponseForbidden
+from django.contrib.auth.models import User
+from django.contrib import messages
+from django.http import HttpResponse, HttpResponseForbidden
 from django.db import transaction
+from django.db.models import Exists, F, OuterRef, Q
 from django.utils import timezone
 from django import forms
 from .models import GeneratedQuestion, InterviewSession, Answer,UserProfile
 from .forms import StartSessionForm, AnswerForm
 from .nlp_utils import analyze_transcript
-import hashlib
 import logging
-from django.contrib import messages
-from .qgen_groq import generate_questions_groq, signature_of_text  # qgen_groq from earlier
-from .views_helpers import generate_question_stub  # if you keep stub in a helper; otherwise use local stub
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FuturesTimeoutError
+from .qgen_groq import generate_questions_groq, generate_session_suggestions, signature_of_text
+from .views_helpers import generate_question_stub, stub_variety
+from .speech_utils import transcribe_audio
 from reportlab.lib.pagesizes import A4
 from reportlab.pdfgen import canvas
 # from reportlab.lib.units import inch
 from textwrap import wrap
-from django.http import HttpResponse
-from django.contrib.auth.models import User
-from django.contrib.auth import login
-from django.contrib import messages
-from .qgen_groq import generate_session_suggestions
-from django.http import HttpResponse, HttpResponseForbidden
-from .speech_utils import transcribe_audio
 
 ROLE_MAP = {
     'tech': 'Technical',
@@ -33,31 +31,21 @@ ROLE_MAP = {
     'beh': 'Behavioral',
 }
 
-def home_page(request):
-    return render(request, 'home.html')
-
-
-
-def generate_question_stub(role, difficulty=3):
-    """
-    Generate a question stub based on the role and difficulty.
-    """
-    role_instructions = {
-        "tech": "Explain a core technical concept or solve a coding problem.",
-        "hr": "Describe how to handle workplace scenarios or HR policies.",
-        "aptitude": "Solve a logical reasoning or quantitative problem.",
-        "behavioral": "Discuss how to handle interpersonal or situational challenges."
-    }
+# start_session waits this long for Groq before falling back to stub questions; a generation
+# that already started keeps running for up to QGEN_GRACE more (Groq retries and backoff
+# included) and still tops up the question pool for later sessions, one still queued is cancelled
+QGEN_DEADLINE = 10  # seconds
+QGEN_GRACE = 5  # seconds
+QGEN_MAX_PENDING = 8  # running + queued generations; past this, start_session uses stubs at once
+_QGEN_EXECUTOR = ThreadPoolExecutor(max_workers=4, thread_name_prefix="qgen")
+_QGEN_SLOTS = threading.BoundedSemaphore(QGEN_MAX_PENDING)
 
-    instruction = role_instructions.get(role.lower(), "Provide a general question related to the role.")
-    text = f"(AI stub) {role} question (difficulty {difficulty}): {instruction}"
-    keywords = instruction.lower().replace(" or ", ",").replace(" ", ",")
+# Answer columns rendered by the summary page and the PDF report
+SUMMARY_ANSWER_FIELDS = ('session', 'index', 'answer_text', 'score', 'feedback', 'improvement_tips', 'question', 'question__text')
 
-    return {"text": text, "keywords": keywords, "difficulty": difficulty}
+def home_page(request):
+    return render(request, 'home.html')
 
-def signature_of_text(text):
-    norm = " ".join(text.lower().split())
-    return hashlib.sha256(norm.encode()).hexdigest()
 
 
 def register(request):
@@ -78,6 +66,16 @@ def register(request):
         }
         
         errors = {}
+
+        # one round trip for both uniqueness checks (blank values must not match blank columns)
+        lookup = Q()
+        if form_data['email']:
+            lookup |= Q(email=form_data['email'])
+        if form_data['username']:
+            lookup |= Q(username=form_data['username'])
+        taken = list(User.objects.filter(lookup).values_list('username', 'email')) if lookup else []
+        email_taken = any(email == form_data['email'] for _, email in taken)
+        username_taken = any(username == form_data['username'] for username, _ in taken)
         
         # Validation
         if not form_data['first_name']:
@@ -90,14 +88,14 @@ def register(request):
             errors['email'] = 'Email address is required.'
         elif not '@' in form_data['email']:
             errors['email'] = 'Please enter a valid email address.'
-        elif User.objects.filter(email=form_data['email']).exists():
+        elif email_taken:
             errors['email'] = 'This email is already registered.'
         
         if not form_data['username']:
             errors['username'] = 'Username is required.'
         elif len(form_data['username']) < 3:
             errors['username'] = 'Username must be at least 3 characters.'
-        elif User.objects.filter(username=form_data['username']).exists():
+        elif username_taken:
             errors['username'] = 'This username is already taken.'
         
         if not form_data['password']:
@@ -154,7 +152,7 @@ def register(request):
             
         except Exception as e:
             # Log the error for debugging
-            print(f"Registration error: {e}")
+            logger.exception("Registration error: %s", e)
             
             # User-friendly error message
             return render(request, 'register.html', {
@@ -184,7 +182,7 @@ def user_logout(request):
 
 @login_required
 def dashboard(request):
-    sessions = InterviewSession.objects.filter(user=request.user).order_by('-started_at')[:10]
+    sessions = InterviewSession.objects.filter(user=request.user).with_stats().order_by('-started_at')[:10]
     
     # Calculate average score
     total_scores = []
@@ -207,6 +205,83 @@ def dashboard(request):
 logger = logging.getLogger(__name__)
 
 
+def _persist_generated_questions(qobjs, raw_role, source):
+    """
+    Store question dicts as GeneratedQuestion rows with one bulk INSERT; the unique signature
+    constraint skips rows that already exist, which are reused (and re-tagged with raw_role).
+    Returns the rows in input order, without duplicates.
+    """
+    pending = {}
+    for qobj in qobjs:
+        text = qobj.get("text", "").strip()
+        if not text:
+            continue
+        sig = qobj.get("signature") or signature_of_text(text)
+        pending.setdefault(sig, (text, qobj))
+    if not pending:
+        return []
+
+    sigs = list(pending)
+    GeneratedQuestion.objects.bulk_create([
+        GeneratedQuestion(
+            role=raw_role,
+            difficulty=qobj.get("difficulty", 3),
+            text=text,
+            keywords=qobj.get("keywords", ""),
+            source=source,
+            signature=sig,
+        )
+        for sig, (text, qobj) in pending.items()
+    ], ignore_conflicts=True)
+    # ensure role stored is the raw_role key so session lookups remain consistent
+    GeneratedQuestion.objects.filter(signature__in=sigs).exclude(role=raw_role).update(role=raw_role)
+
+    rows = {}
+    for qrow in GeneratedQuestion.objects.filter(signature__in=sigs).order_by("id"):
+        rows.setdefault(qrow.signature, qrow)
+    return [rows[sig] for sig in sigs if sig in rows]
+
+
+def _generate_llm_questions(request, raw_role, role_for_prompt, n):
+    """
+    Run generate_questions_groq on the shared executor, waiting at most QGEN_DEADLINE.
+    Returns [] (and warns the user) on timeout, error, or when QGEN_MAX_PENDING generations
+    are already pending, so a Groq outage cannot pile up abandoned work.
+    """
+    # questions this user was already given; the pool serves others first
+    given = frozenset(
+        Answer.objects.filter(session__user=request.user, question__isnull=False)
+        .values_list('question__signature', flat=True).distinct()
+    )
+    # queueing time counts against the deadline, so a backlog cannot stretch the job's lifetime
+    deadline = time.monotonic() + QGEN_DEADLINE + QGEN_GRACE
+    if not _QGEN_SLOTS.acquire(blocking=False):
+        logger.warning("Groq generation backlog full; using fallback questions for role %s", raw_role)
+        messages.warning(request, "AI question generation is busy — using fallback questions.")
+        return []
+    try:
+        future = _QGEN_EXECUTOR.submit(
+            generate_questions_groq, role=role_for_prompt, n=n, difficulty=3, model="llama-3.1-8b-instant",
+            exclude_signatures=given, deadline=deadline,
+        )
+    except Exception:
+        _QGEN_SLOTS.release()
+        raise
+    # the slot is freed when the job finishes or is cancelled, not when this request gives up on it
+    future.add_done_callback(lambda f: _QGEN_SLOTS.release())
+
+    try:
+        return future.result(timeout=QGEN_DEADLINE)
+    except FuturesTimeoutError:
+        future.cancel()  # drops it if still queued; a running one stops at its deadline
+        logger.warning("Groq generation exceeded %ss for role %s; using fallback questions", QGEN_DEADLINE, raw_role)
+        messages.warning(request, "AI question generation is taking too long — using fallback questions.")
+    except Exception as e:
+        logger.exception("Groq generation error: %s", e)
+        messages.warning(request, "AI question generation temporarily failed — using fallback questions.")
+    return []
+
+
 # Replace the start_session function in interviewapp/views.py with this:
 @login_required
 def start_session(request):
@@ -221,91 +296,68 @@ def start_session(request):
             role_for_prompt = ROLE_MAP.get(raw_role.lower(), raw_role.capitalize())
             n = form.cleaned_data['n_questions']
 
-            # create the session
-            s = InterviewSession.objects.create(user=request.user, role=raw_role, total_score=None, current_index=0)
-
             created = 0
             attempts = 0
             max_attempts = max(50, n * 10)
             created_question_ids = []  # keep order of created questions
+            created_ids_set = set()  # O(1) membership checks alongside the ordered list
 
-            # 1) Try LLM generation first
-            try:
-                llm_questions = generate_questions_groq(role=role_for_prompt, n=n, difficulty=3, model="llama-3.1-8b-instant")
-            except Exception as e:
-                logger.exception("Groq generation error: %s", e)
-                messages.warning(request, "AI question generation temporarily failed — using fallback questions.")
-                llm_questions = []
-
-            # 2) Save unique LLM questions to DB (but attach only IDs to this session)
-            for qobj in llm_questions:
-                if created >= n:
-                    break
-                text = qobj.get("text", "").strip()
-                if not text:
-                    continue
-                sig = signature_of_text(text)
-                # If a DB row with same signature exists, reuse that question row (but still include it in session)
-                qrow, _ = GeneratedQuestion.objects.get_or_create(
-                    signature=sig,
-                    defaults={
-                        "role": raw_role,
-                        "difficulty": qobj.get("difficulty", 3),
-                        "text": text,
-                        "keywords": qobj.get("keywords", ""),
-                        "source": "llm"
-                    }
-                )
-                # ensure role stored is the raw_role key so session lookups remain consistent
-                if qrow.role != raw_role:
-                    qrow.role = raw_role
-                    qrow.save(update_fields=["role"])
-
-                created_question_ids.append(qrow.id)
-                created += 1
-
-            # 3) If still need more, create fallback stub questions
-            while created < n and attempts < max_attempts:
-                attempts += 1
-                payload = generate_question_stub(raw_role, difficulty=2)
-                text = payload.get('text', '').strip()
-                if not text:
-                    continue
-                sig = signature_of_text(text)
-                qrow, created_new = GeneratedQuestion.objects.get_or_create(
-                    signature=sig,
-                    defaults={
-                        "role": raw_role,
-                        "difficulty": payload.get("difficulty", 3),
-                        "text": text,
-                        "keywords": payload.get("keywords", ""),
-                        "source": "template"
-                    }
+            # 1) Try LLM generation first (outside the transaction below: it is a network call)
+            llm_questions = _generate_llm_questions(request, raw_role, role_for_prompt, n)
+
+            # the questions, the session and its Answer placeholders are committed together
+            with transaction.atomic():
+                # 2) Save unique LLM questions to DB (but attach only IDs to this session)
+                # stub candidates are deduped against these too, so none of them maps onto a row
+                # the session already holds and gets dropped after the loop has stopped
+                stub_sigs = set()
+                for qrow in _persist_generated_questions(llm_questions[:n], raw_role, source="llm"):
+                    created_question_ids.append(qrow.id)
+                    created_ids_set.add(qrow.id)
+                    stub_sigs.add(qrow.signature)
+                    created += 1
+
+                # 3) If still need more, create fallback stub questions; candidates are deduped
+                #    in memory and then checked/inserted against the DB in one batch
+                stub_payloads = []
+                # stubs are randomized, so repeats alone prove nothing; stop early only once every
+                # text the role's templates can produce has been drawn
+                stub_space = stub_variety(raw_role)
+                drawn_sigs = set()
+                while created + len(stub_payloads) < n and attempts < max_attempts and len(drawn_sigs) < stub_space:
+                    attempts += 1
+                    payload = generate_question_stub(raw_role, difficulty=2)
+                    text = payload.get('text', '').strip()
+                    if not text:
+                        continue
+                    sig = signature_of_text(text)
+                    drawn_sigs.add(sig)
+                    if sig in stub_sigs:
+                        continue
+                    stub_sigs.add(sig)
+                    stub_payloads.append({**payload, "text": text, "signature": sig})
+
+                for qrow in _persist_generated_questions(stub_payloads, raw_role, source="template"):
+                    # if this qrow already in our session list, skip (we want n unique entries)
+                    if qrow.id in created_ids_set or created >= n:
+                        continue
+                    created_question_ids.append(qrow.id)
+                    created_ids_set.add(qrow.id)
+                    created += 1
+
+                # 4) If created < n still, warn user (but proceed with whatever created)
+                if created < n:
+                    messages.warning(request, f"Only created {created}/{n} questions for this session.")
+
+                # 5) Create the session and its Answer placeholders in the exact order
+                s = InterviewSession.objects.create(
+                    user=request.user, role=raw_role, total_score=None, current_index=0,
+                    total_questions=len(created_question_ids),
                 )
-                # If we already had the signature, but the role differs, ensure consistency:
-                if qrow.role != raw_role:
-                    qrow.role = raw_role
-                    qrow.save(update_fields=["role"])
-
-                # if this qrow already in our session list, skip (we want n unique entries)
-                if qrow.id in created_question_ids:
-                    continue
-
-                created_question_ids.append(qrow.id)
-                created += 1
-
-            # 4) If created < n still, warn user (but proceed with whatever created)
-            if created < n:
-                messages.warning(request, f"Only created {created}/{n} questions for this session.")
-
-            # 5) Create Answer placeholders in the exact order for this session
-            # remove any existing answers for this session (defensive)
-            s.answers.all().delete()
-            idx = 1
-            for qid in created_question_ids:
-                qobj = GeneratedQuestion.objects.get(id=qid)
-                Answer.objects.create(session=s, question=qobj, index=idx)
-                idx += 1
+                Answer.objects.bulk_create([
+                    Answer(session=s, question_id=qid, index=idx)
+                    for idx, qid in enumerate(created_question_ids, start=1)
+                ])
 
             # 6) Redirect to the first question (next_question reads the next unprocessed answer)
             return redirect('interviewapp:next_question', session_id=s.id)
@@ -324,7 +376,13 @@ def next_question(request, session_id):
 
     # find the next Answer placeholder for this session that is not processed
     # prefer 'processed' flag, or if you use answer_text, use answer_text=''
-    next_ans = session.answers.filter(processed=False).order_by('index').first()
+    next_ans = (
+        session.answers.filter(processed=False)
+        .select_related('question')
+        .only('id', 'session', 'index', 'question', 'question__text', 'question__difficulty')
+        .order_by('index')
+        .first()
+    )
     if not next_ans:
         # no more questions -> go to summary
         return redirect('interviewapp:session_summary', session_id=session.id)
@@ -404,17 +462,23 @@ def skip_question(request, session_id):
         return HttpResponseForbidden()
     
     # Mark current question as skipped (or create empty answer)
-    used_q_ids = session.answers.values_list('question_id', flat=True)
-    q = GeneratedQuestion.objects.filter(role=session.role).exclude(id__in=used_q_ids).first()
+    # correlated NOT EXISTS: one query that stops at the first unused question (and, unlike
+    # NOT IN, is not emptied by answers whose question was deleted/NULL)
+    used = Answer.objects.filter(session=session, question_id=OuterRef('pk'))
+    q = GeneratedQuestion.objects.filter(role=session.role).filter(~Exists(used)).order_by('id').only('id').first()
     
     if q:
         with transaction.atomic():
-            session.current_index += 1
-            session.save()
+            # one narrow, race-safe UPDATE instead of rewriting every column with save()
+            InterviewSession.objects.filter(pk=session.pk).update(
+                current_index=F('current_index') + 1,
+                total_questions=F('total_questions') + 1,
+            )
+            session.refresh_from_db(fields=['current_index', 'total_questions'])
             Answer.objects.create(
                 session=session, 
                 question=q, 
-                index=session.current_index,
+                index=session.total_questions,  # appended after the existing rows
                 answer_text="[Skipped]",
                 score=0
             )
@@ -423,54 +487,59 @@ def skip_question(request, session_id):
 
 @login_required
 def end_session(request, session_id):
-    session = get_object_or_404(InterviewSession, id=session_id)
-    if session.user != request.user:
+    # Mark session as completed; the ownership check is part of the UPDATE itself
+    updated = InterviewSession.objects.filter(id=session_id, user=request.user).update(
+        completed=True, completed_at=timezone.now()
+    )
+    if not updated:
+        get_object_or_404(InterviewSession, id=session_id)  # 404 if missing, else not ours
         return HttpResponseForbidden()
     
-    # Mark session as completed
-    session.completed = True
-    session.completed_at = timezone.now()
-    session.save()
-    
-    messages.success(request, f"Interview session {session.id} completed!")
-    return redirect('interviewapp:session_summary', session_id=session.id)
+    messages.success(request, f"Interview session {session_id} completed!")
+    return redirect('interviewapp:session_summary', session_id=session_id)
 
 
 
+def _feedback_highlights(answers):
+    """
+    Lightweight strengths/improvements extraction from answer.feedback.
+    Returns (strengths[:3], improvements[:5]), order-preserving and deduped.
+    """
+    strengths = []
+    improvements = []
+    for answer in answers:
+        fb = (answer.feedback or "").lower()
+        if not fb:
+            continue
+        text_snippet = answer.question.text[:70] + ("..." if len(answer.question.text) > 70 else "")
+        if 'good' in fb or 'excellent' in fb or 'well' in fb:
+            strengths.append(f"Strong answer to: {text_snippet}")
+        if 'improv' in fb or 'better' in fb or 'need' in fb:
+            improvements.append(f"Could improve: {text_snippet}")
+
+    return list(dict.fromkeys(strengths))[:3], list(dict.fromkeys(improvements))[:5]
+
+
 @login_required
 def session_summary(request, session_id):
     session = get_object_or_404(InterviewSession, id=session_id)
     if session.user != request.user:
         return HttpResponseForbidden()
 
-    # fetch answers and compute avg
-    answers = session.answers.select_related('question').all().order_by('index')
+    # fetch answers (only the columns the summary/suggestions use) and compute avg
+    answers = session.answers.select_related('question').only(*SUMMARY_ANSWER_FIELDS).order_by('index')
     scores = [a.score for a in answers if a.score is not None]
     avg = (sum(scores) / len(scores)) if scores else None
-    session.total_score = avg
-    # Save total_score but avoid saving suggestions here; we may persist later
-    session.save(update_fields=['total_score'])
+    # Save total_score only when it changed, so re-rendering the summary stays a read
+    if session.total_score != avg:
+        session.total_score = avg
+        session.save(update_fields=['total_score'])
 
     # duration (minutes) — uses session.completed_at if present
     duration = 0
     if session.started_at and getattr(session, 'completed_at', None):
         duration = int((session.completed_at - session.started_at).total_seconds() / 60)
 
-    # lightweight strengths/improvements extraction from answer.feedback (keeps your original behavior)
-    strengths = []
-    improvements = []
-    for answer in answers:
-        fb = (answer.feedback or "").lower()
-        text_snippet = answer.question.text[:70] + ("..." if len(answer.question.text) > 70 else "")
-        if fb:
-            if 'good' in fb or 'excellent' in fb or 'well' in fb:
-                strengths.append(f"Strong answer to: {text_snippet}")
-            if 'improv' in fb or 'better' in fb or 'need' in fb:
-                improvements.append(f"Could improve: {text_snippet}")
-
-    strengths = list(dict.fromkeys(strengths))[:3]     # preserve order, dedupe, limit
-    improvements = list(dict.fromkeys(improvements))[:5]
-
     # Build the simple answers list to send to the LLM helper
     answer_payload = []
     for a in answers:
@@ -491,9 +560,8 @@ def session_summary(request, session_id):
             if not isinstance(suggestions, dict):
                 suggestions = None
         except Exception as e:
-            # LLM failed — fallback to simple heuristics (use strengths/improvements we built)
+            # LLM failed — fallback to simple heuristics (strengths/improvements from feedback)
             suggestions = None
-            logger = logging.getLogger(__name__)
             logger.exception("Suggestion generation failed: %s", e)
 
     # If suggestions exist and session model supports persisting them, save once
@@ -507,6 +575,11 @@ def session_summary(request, session_id):
             # ignore save errors (DB migration might not exist); keep suggestions ephemeral
             pass
 
+    # the feedback keyword scan is only a fallback for missing/partial LLM suggestions
+    strengths, improvements = [], []
+    if not suggestions or 'strengths' not in suggestions or 'improvements' not in suggestions:
+        strengths, improvements = _feedback_highlights(answers)
+
     # If suggestions missing, create harmless defaults
     if not suggestions:
         suggestions = {
@@ -515,7 +588,6 @@ def session_summary(request, session_id):
             "overall_tip": "Practice concise explanations, and focus on weaker areas identified above.",
             "resources": ["Review domain fundamentals", "Practice mock interviews", "Study common patterns"]
         }
-        print(session.total_score)
 
     # Render the template with both LLM suggestions and the simple parsed lists
     return render(request, 'summary.html', {
@@ -618,7 +690,7 @@ def download_report(request, session_id):
     if session.user != request.user:
         return HttpResponseForbidden()
 
-    answers = session.answers.select_related('question').all().order_by('index')
+    answers = session.answers.select_related('question').only(*SUMMARY_ANSWER_FIELDS).order_by('index')
 
     # Recalculate average score (same logic as summary)
     scores = [a.score for a in answers if a.score is not None]
@@ -644,11 +716,13 @@ def download_report(request, session_id):
     y = height - 50
 
     def draw_block(text, y_pos, bold=False):
-        pdf.setFont("Helvetica-Bold" if bold else "Helvetica", 10)
-        for line in wrap(text, 95):
-            pdf.drawString(x_margin, y_pos, line)
-            y_pos -= 14
-        return y_pos
+        # one text object per block: font is set once and all wrapped lines go in one draw call
+        lines = wrap(text, 95)
+        block = pdf.beginText(x_margin, y_pos)
+        block.setFont("Helvetica-Bold" if bold else "Helvetica", 10, leading=14)
+        block.textLines(lines, trim=0)
+        pdf.drawText(block)
+        return y_pos - 14 * len(lines)
 
     # ================= TITLE =================
     pdf.setFont("Helvetica-Bold", 20)
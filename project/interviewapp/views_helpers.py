@@ -1,5 +1,117 @@
 # interviewapp/views_helpers.py
 import random
+from string import Formatter
+
+# fixed vocabulary, built once at import instead of on every call
+_TECH_TERMS = (
+    "process",
+    "thread",
+    "database indexing",
+    "REST API",
+    "authentication",
+    "caching",
+    "load balancing",
+    "microservices",
+    "HTTP protocol",
+    "Docker container",
+)
+
+_TECH_TERMS_LOWER = tuple(t.lower() for t in _TECH_TERMS)
+
+_SCENARIOS = (
+    "a production outage",
+    "a conflicting requirement",
+    "a tight deadline",
+    "scaling the system to 10x",
+    "optimizing slow database queries",
+    "managing teamwork conflicts",
+    "debugging a critical bug",
+    "handling unexpected edge cases",
+)
+_SCENARIO_KEYWORDS = tuple(s.split()[0].lower() for s in _SCENARIOS)
+
+# randrange bounds for the aptitude template's {n} people and {m} items
+_N_RANGE = (2, 21)
+_M_RANGE = (5, 101)
+
+_TEMPLATES = {
+    'tech': (
+        "Explain how {a} works and give an example.",
+        "Describe the difference between {a} and {b} with a real-life example.",
+        "How would you troubleshoot issues related to {a}?",
+        "Design a small system using {a} and explain the flow.",
+        "What are common mistakes developers make with {a}?"
+    ),
+    'hr': (
+        "Tell me about a time you handled {scenario}.",
+        "Describe your strengths and weaknesses in a real situation.",
+        "How do you deal with conflicts inside a team?",
+        "Why do you think you are a good fit for this role?",
+        "Describe your biggest achievement and how you reached it."
+    ),
+    'apt': (
+        "If {n} people share {m} items, how many items per person? Explain reasoning.",
+        "Solve a real-life problem using ratios or percentages.",
+        "Explain how to break a complex problem into smaller steps.",
+        "Given a series: 2, 6, 18… find the next term and justify.",
+        "How do you approach solving optimization problems?"
+    ),
+    'beh': (
+        "Tell me about a time you had to make a quick decision under pressure.",
+        "Describe a failure you experienced and what you learned.",
+        "How do you motivate yourself during repetitive tasks?",
+        "Explain a situation where you took leadership voluntarily.",
+        "Describe how you handle criticism or negative feedback."
+    ),
+}
+
+# static keywords that pad each role's stubs once the drawn placeholder values run out
+_ROLE_KEYWORDS = {
+    'tech': ("example", "design"),
+    'hr': ("experience", "team"),
+    'apt': ("reasoning", "steps"),
+    'beh': ("situation", "learned"),
+}
+
+
+def _template_fields(template):
+    return frozenset(name for _, name, _, _ in Formatter().parse(template) if name)
+
+
+# role -> (((template, placeholder names), ...), pad keywords): one lookup per call, and each
+# call only draws the values its chosen template actually uses
+_ROLE_STUBS = {
+    role: (tuple((t, _template_fields(t)) for t in templates), _ROLE_KEYWORDS[role])
+    for role, templates in _TEMPLATES.items()
+}
+
+
+def _template_variety(fields):
+    # number of distinct texts one template can produce (b is always drawn distinct from a)
+    count = 1
+    if "a" in fields:
+        count *= len(_TECH_TERMS)
+    if "b" in fields:
+        count *= len(_TECH_TERMS) - 1
+    if "scenario" in fields:
+        count *= len(_SCENARIOS)
+    if "n" in fields:
+        count *= len(range(*_N_RANGE))
+    if "m" in fields:
+        count *= len(range(*_M_RANGE))
+    return count
+
+
+_STUB_VARIETY = {
+    role: sum(_template_variety(fields) for _, fields in templates)
+    for role, (templates, _) in _ROLE_STUBS.items()
+}
+
+
+def stub_variety(role):
+    """How many distinct stub texts generate_question_stub can return for role."""
+    return _STUB_VARIETY.get(role) or _STUB_VARIETY['tech']
+
 
 def generate_question_stub(role, difficulty=2):
     """
@@ -7,85 +119,42 @@ def generate_question_stub(role, difficulty=2):
     Generates varied, unique-ish questions using templates.
     """
 
-    tech_terms = [
-        "process",
-        "thread",
-        "database indexing",
-        "REST API",
-        "authentication",
-        "caching",
-        "load balancing",
-        "microservices",
-        "HTTP protocol",
-        "Docker container"
-    ]
-
-    scenarios = [
-        "a production outage",
-        "a conflicting requirement",
-        "a tight deadline",
-        "scaling the system to 10x",
-        "optimizing slow database queries",
-        "managing teamwork conflicts",
-        "debugging a critical bug",
-        "handling unexpected edge cases"
-    ]
-
-    templates = {
-        'tech': [
-            "Explain how {a} works and give an example.",
-            "Describe the difference between {a} and {b} with a real-life example.",
-            "How would you troubleshoot issues related to {a}?",
-            "Design a small system using {a} and explain the flow.",
-            "What are common mistakes developers make with {a}?"
-        ],
-        'hr': [
-            "Tell me about a time you handled {scenario}.",
-            "Describe your strengths and weaknesses in a real situation.",
-            "How do you deal with conflicts inside a team?",
-            "Why do you think you are a good fit for this role?",
-            "Describe your biggest achievement and how you reached it."
-        ],
-        'apt': [
-            "If {n} people share {m} items, how many items per person? Explain reasoning.",
-            "Solve a real-life problem using ratios or percentages.",
-            "Explain how to break a complex problem into smaller steps.",
-            "Given a series: 2, 6, 18… find the next term and justify.",
-            "How do you approach solving optimization problems?"
-        ],
-        'beh': [
-            "Tell me about a time you had to make a quick decision under pressure.",
-            "Describe a failure you experienced and what you learned.",
-            "How do you motivate yourself during repetitive tasks?",
-            "Explain a situation where you took leadership voluntarily.",
-            "Describe how you handle criticism or negative feedback."
-        ]
-    }
-
-    # choose a category (fallback if role missing)
-    role_key = role if role in templates else 'tech'
-
-    # choose template
-    template = random.choice(templates[role_key])
+    # choose a template from the role's category (fallback to tech if role missing)
+    templates, pad_keywords = _ROLE_STUBS.get(role) or _ROLE_STUBS['tech']
+    template, fields = random.choice(templates)
 
-    # fill random variables
-    a = random.choice(tech_terms)
-    b = random.choice([t for t in tech_terms if t != a])
-    scenario = random.choice(scenarios)
-    n = random.randint(2, 20)
-    m = random.randint(5, 100)
+    # fill only the random variables this template uses; drawn terms double as keywords
+    values = {}
+    keywords = []
+    if "a" in fields or "b" in fields:
+        # two distinct terms: draw b from the other len-1 slots by shifting past a's index
+        i = random.randrange(len(_TECH_TERMS))
+        j = random.randrange(len(_TECH_TERMS) - 1)
+        if j >= i:
+            j += 1
+        values["a"] = _TECH_TERMS[i]
+        values["b"] = _TECH_TERMS[j]
+        keywords.append(_TECH_TERMS_LOWER[i])
+        if "b" in fields:
+            keywords.append(_TECH_TERMS_LOWER[j])
+    if "scenario" in fields:
+        k = random.randrange(len(_SCENARIOS))
+        values["scenario"] = _SCENARIOS[k]
+        keywords.append(_SCENARIO_KEYWORDS[k])
+    if "n" in fields:
+        values["n"] = random.randrange(*_N_RANGE)   # randint(2, 20) without the wrapper call
+    if "m" in fields:
+        values["m"] = random.randrange(*_M_RANGE)
 
-    # fill template values
-    text = template.format(a=a, b=b, scenario=scenario, n=n, m=m).strip()
+    # fill template values (templates and fill values carry no surrounding whitespace)
+    text = template.format(**values)
 
-    # generate keywords
-    keywords = []
-    for kw in [a, b, scenario.split()[0], "explain"]:
-        if kw and len(keywords) < 4:
-            keywords.append(kw.lower())
+    # generate keywords: drawn terms, then "explain", padded with the role's static keywords
+    keywords.append("explain")
+    keywords.extend(pad_keywords)
 
     return {
         "text": text,
-        "keywords": ",".join(keywords),
+        "keywords": ",".join(keywords[:4]),
         "difficulty": difficulty,
     }